@@ -16,7 +16,11 @@
 
 # %% Import libraries
 from fabric_data_agent_sdk import FabricDataAgentClient
-import json
+import sys
+
+sys.path.append("..")
+from utils.agent import get_client
+from utils.config import save_config
 
 # %% Configuration
 # Update these values with your workspace and agent information
@@ -24,12 +28,13 @@ CONFIG = {
     "workspace_id": "YOUR_WORKSPACE_ID",  # e.g., "fc251958-7c18-4bf4-b9bb-91a94cd07da3"
     "agent_id": "YOUR_AGENT_ID",          # e.g., "12345678-1234-1234-1234-123456789abc"
     "lakehouse_id": "YOUR_LAKEHOUSE_ID",  # e.g., "4b5b3e99-01ff-4ec7-b3f1-83a637953124"
-    "agent_name": "Sample Analytics Agent"
+    "agent_name": "Sample Analytics Agent",
+    "sql_endpoint": "YOUR_SQL_ENDPOINT.datawarehouse.fabric.microsoft.com",  # used for SQL validation
+    "database": "YOUR_DATABASE"
 }
 
 # Save configuration for other notebooks
-with open("../config/agent_config.json", "w") as f:
-    json.dump(CONFIG, f, indent=2)
+save_config(CONFIG)
 
 print("✅ Configuration saved!")
 
@@ -48,10 +53,7 @@ def initialize_agent_client(workspace_id: str, agent_id: str = None):
     try:
         if agent_id:
             # Connect to existing agent
-            client = FabricDataAgentClient(
-                workspace_id=workspace_id,
-                agent_id=agent_id
-            )
+            client = get_client(workspace_id, agent_id)
             print(f"✅ Connected to existing agent: {client.agent_name}")
         else:
             # Create new agent
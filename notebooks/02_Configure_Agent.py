@@ -10,20 +10,21 @@
 # - Behavioral rules to prevent over-interpretation
 
 # %% Load configuration
-import json
+import sys
+from typing import Dict
 
-with open("../config/agent_config.json", "r") as f:
-    CONFIG = json.load(f)
+sys.path.append("..")
+from utils.config import load_config
+
+CONFIG = load_config()
 
 print(f"✅ Loaded configuration for workspace: {CONFIG['workspace_id']}")
 
 # %% Initialize client (assumes 01_Setup has been run)
 from fabric_data_agent_sdk import FabricDataAgentClient
+from utils.agent import get_client
 
-client = FabricDataAgentClient(
-    workspace_id=CONFIG["workspace_id"],
-    agent_id=CONFIG["agent_id"]
-)
+client = get_client(CONFIG["workspace_id"], CONFIG["agent_id"])
 
 # %% Define AI Instructions
 # These instructions guide how the agent interprets questions and generates SQL
@@ -122,18 +123,45 @@ if CONFIG.get("lakehouse_id"):
     add_data_source(client, CONFIG["lakehouse_id"])
 
 # %% Verify configuration
+def get_agent_snapshot(client: FabricDataAgentClient) -> Dict:
+    """
+    Read agent configuration once.
+    
+    Uses the SDK's single describe() call when available; otherwise each
+    lazily-fetched attribute is read exactly once.
+    
+    Args:
+        client: The FabricDataAgentClient instance
+    
+    Returns:
+        Dictionary with agent_name, instructions, data_sources and examples
+    """
+    describe = getattr(client, "describe", None)
+    if callable(describe):
+        return describe()
+    
+    return {
+        "agent_name": client.agent_name,
+        "instructions": client.instructions,
+        "data_sources": client.data_sources,
+        "examples": client.examples
+    }
+
 def verify_agent_configuration(client: FabricDataAgentClient):
     """Display current agent configuration"""
     
+    snapshot = get_agent_snapshot(client)
+    data_sources = snapshot.get("data_sources", [])
+    
     print("\n📋 Agent Configuration:")
-    print(f"   Name: {client.agent_name}")
-    print(f"   Instructions: {len(client.instructions)} characters")
-    print(f"   Data Sources: {len(client.data_sources)}")
+    print(f"   Name: {snapshot.get('agent_name', 'N/A')}")
+    print(f"   Instructions: {len(snapshot.get('instructions', ''))} characters")
+    print(f"   Data Sources: {len(data_sources)}")
     
-    for ds in client.data_sources:
+    for ds in data_sources:
         print(f"      - {ds['source_type']}: {ds['source_id']}")
     
-    print(f"   Examples: {len(client.examples)}")
+    print(f"   Examples: {len(snapshot.get('examples', []))}")
     
     return True
 
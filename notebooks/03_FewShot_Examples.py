@@ -12,19 +12,32 @@
 # - Extract examples from existing .pbip reports
 
 # %% Setup
+import atexit
+import hashlib
 import json
+import os
+import queue
+import sys
+import threading
 import pyodbc
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
 
-with open("../config/agent_config.json", "r") as f:
-    CONFIG = json.load(f)
+# Let the ODBC driver manager reuse connections; must be set before the
+# first pyodbc.connect in the process
+pyodbc.pooling = True
+
+sys.path.append("..")
+from utils.config import load_config
+
+CONFIG = load_config()
 
 from fabric_data_agent_sdk import FabricDataAgentClient
+from utils.agent import get_client
+from utils.pbip_extractor import convert_dax_to_example
 
-client = FabricDataAgentClient(
-    workspace_id=CONFIG["workspace_id"],
-    agent_id=CONFIG["agent_id"]
-)
+client = get_client(CONFIG["workspace_id"], CONFIG["agent_id"])
 
 # %% Define SQL Endpoint connection (for validation)
 SQL_ENDPOINT = "YOUR_SQL_ENDPOINT.datawarehouse.fabric.microsoft.com"
@@ -41,30 +54,149 @@ def get_sql_connection():
     )
     return pyodbc.connect(connection_string)
 
+# %% Connection pool
+# Opening a connection runs the full ODBC + Azure AD handshake, so validation
+# borrows from a small pool instead of authenticating once per example.
+SQL_POOL_SIZE = 4
+
+# Idle connections; the semaphore caps how many are borrowed at once and is
+# released on every path (failed open, broken or healthy release)
+_sql_pool: "queue.Queue[pyodbc.Connection]" = queue.Queue()
+_sql_pool_slots = threading.BoundedSemaphore(SQL_POOL_SIZE)
+
+def _get_conn() -> pyodbc.Connection:
+    """Borrow a connection from the pool, opening one if none is idle"""
+    # Blocks until fewer than SQL_POOL_SIZE connections are borrowed
+    _sql_pool_slots.acquire()
+    
+    try:
+        return _sql_pool.get_nowait()
+    except queue.Empty:
+        pass
+    
+    try:
+        conn = get_sql_connection()
+        # Validation only reads; avoid holding implicit transactions open
+        conn.autocommit = True
+    except BaseException:
+        _sql_pool_slots.release()
+        raise
+    
+    return conn
+
+def _release_conn(conn: pyodbc.Connection, broken: bool = False):
+    """Return a connection to the pool, or drop it if the link is broken"""
+    try:
+        if broken:
+            try:
+                conn.close()
+            except pyodbc.Error:
+                pass
+        else:
+            _sql_pool.put(conn)
+    finally:
+        _sql_pool_slots.release()
+
+# %% Validation cache
+# Successful validations are persisted by endpoint, database and SQL hash so
+# re-running the notebook skips the SQL Endpoint for examples that have not changed.
+VALIDATION_CACHE_PATH = Path("../config/.sql_validation_cache.json")
+
+def _load_validation_cache() -> Dict[str, Dict]:
+    """Load cached validation results from disk"""
+    if not VALIDATION_CACHE_PATH.exists():
+        return {}
+    
+    try:
+        with open(VALIDATION_CACHE_PATH) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+_validation_cache = _load_validation_cache()
+
+@atexit.register
+def _save_validation_cache():
+    """Write cached validation results back to disk"""
+    try:
+        with open(VALIDATION_CACHE_PATH, "w") as f:
+            json.dump(_validation_cache, f, indent=2)
+    except OSError:
+        pass
+
+def _sql_cache_key(sql: str) -> str:
+    """Hash of the target endpoint, database and normalized SQL text"""
+    key = "\0".join((SQL_ENDPOINT, DATABASE, sql.strip()))
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+
 # %% SQL Validation Function
-def validate_sql_query(sql: str, timeout: int = 30) -> Dict:
+def validate_sql_query(
+    sql: str,
+    timeout: int = 30,
+    deep: bool = False,
+    use_cache: bool = True
+) -> Dict:
     """
-    Validate SQL query by executing against SQL Endpoint.
+    Validate SQL query against SQL Endpoint.
+    
+    By default the query is only parsed and bound on the server via
+    sys.sp_describe_first_result_set, so nothing is scanned. Pass deep=True
+    to execute it and fetch a sample row instead.
+    
+    Successful describe-only results are cached on disk per endpoint,
+    database and SQL text.
     
     Args:
         sql: The SQL query to validate
         timeout: Query timeout in seconds
+        deep: Whether to execute the query rather than just describe it
+        use_cache: Whether to reuse/store cached describe-only results
     
     Returns:
         Dict with validation results
     """
+    if not sql or not sql.strip():
+        return {
+            "valid": False,
+            "error": "Empty SQL query"
+        }
+    
+    cache_key = _sql_cache_key(sql)
+    if use_cache and not deep and cache_key in _validation_cache:
+        cached = _validation_cache[cache_key]
+        return {**cached, "columns": list(cached["columns"])}
+    
+    try:
+        conn = _get_conn()
+    except Exception as e:
+        return {
+            "valid": False,
+            "error": str(e)
+        }
+    
+    broken = False
+    cursor = None
     try:
-        conn = get_sql_connection()
         cursor = conn.cursor()
+        
+        if not deep:
+            cursor.execute("EXEC sys.sp_describe_first_result_set @tsql = ?", sql)
+            rows = cursor.fetchall()
+            
+            result = {
+                "valid": True,
+                "columns": [r.name for r in rows if not r.is_hidden]
+            }
+            if use_cache:
+                _validation_cache[cache_key] = {**result, "columns": list(result["columns"])}
+            return result
+        
         cursor.execute(sql)
         
         # Fetch first row to verify query works
         row = cursor.fetchone()
         columns = [desc[0] for desc in cursor.description]
         
-        cursor.close()
-        conn.close()
-        
         return {
             "valid": True,
             "columns": columns,
@@ -72,10 +204,21 @@ def validate_sql_query(sql: str, timeout: int = 30) -> Dict:
         }
         
     except Exception as e:
+        # A dropped link (or one that can't even open a cursor) must not be
+        # handed to the next caller
+        broken = cursor is None or isinstance(e, pyodbc.OperationalError)
         return {
             "valid": False,
             "error": str(e)
         }
+    
+    finally:
+        if cursor is not None:
+            try:
+                cursor.close()
+            except pyodbc.Error:
+                broken = True
+        _release_conn(conn, broken=broken)
 
 # %% Define Few-Shot Examples by Category
 FEWSHOT_EXAMPLES = {
@@ -173,47 +316,96 @@ FROM dbo.UsageMetrics"""
     ]
 }
 
+def _normalize_sql(sql: str) -> str:
+    """Collapse whitespace so formatting differences don't defeat lookups"""
+    return " ".join(sql.split())
+
+# Normalized SQL per category, for O(1) duplicate checks
+FEWSHOT_SQL = {
+    category: frozenset(_normalize_sql(ex["sql"]) for ex in category_examples)
+    for category, category_examples in FEWSHOT_EXAMPLES.items()
+}
+
+def is_known_example(sql: str) -> bool:
+    """Check whether SQL already exists among the few-shot examples"""
+    key = _normalize_sql(sql)
+    return any(key in category_sql for category_sql in FEWSHOT_SQL.values())
+
 # %% Add examples with validation
+def _add_one(client: FabricDataAgentClient, ex: Dict) -> Tuple[bool, List[str]]:
+    """Add one example, returning (added, output lines)"""
+    question = ex["question"]
+    try:
+        client.add_example(question=question, sql=ex["sql"])
+        return True, [f"   ✅ {question}"]
+    except Exception as e:
+        return False, [f"   ❌ {question} - {str(e)}"]
+
 def add_examples_with_validation(
     client: FabricDataAgentClient,
     examples: Dict[str, List[Dict]],
-    validate: bool = True
+    validate: bool = True,
+    max_workers: int = 8
 ):
     """
     Add few-shot examples to the agent with optional SQL validation.
     
+    Each distinct SQL text is validated once, concurrently against the SQL
+    Endpoint pool. Valid examples are then sent in one request when the SDK offers
+    add_examples, otherwise added concurrently one by one.
+    
     Args:
         client: The FabricDataAgentClient instance
         examples: Dictionary of categorized examples
         validate: Whether to validate SQL before adding
+        max_workers: Maximum number of concurrent requests
     """
     added = 0
     failed = 0
     
-    for category, category_examples in examples.items():
-        print(f"\n📂 Category: {category}")
-        
-        for ex in category_examples:
-            question = ex["question"]
-            sql = ex["sql"]
+    flat = [(category, ex) for category, category_examples in examples.items() for ex in category_examples]
+    outcomes: List[Optional[Tuple[bool, List[str]]]] = [None] * len(flat)
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # Validate if requested, once per distinct SQL
+        if validate:
+            unique_sql = list(dict.fromkeys(ex["sql"].strip() for _, ex in flat))
+            validation = dict(zip(unique_sql, pool.map(validate_sql_query, unique_sql)))
             
-            # Validate if requested
-            if validate:
-                result = validate_sql_query(sql)
+            for i, (_, ex) in enumerate(flat):
+                result = validation[ex["sql"].strip()]
                 if not result["valid"]:
-                    print(f"   ❌ {question}")
-                    print(f"      Error: {result['error']}")
-                    failed += 1
-                    continue
-            
-            # Add to agent
+                    outcomes[i] = (False, [f"   ❌ {ex['question']}", f"      Error: {result['error']}"])
+        
+        pending = [i for i, outcome in enumerate(outcomes) if outcome is None]
+        
+        # Add to agent
+        if hasattr(client, "add_examples"):
+            batch = [{"question": flat[i][1]["question"], "sql": flat[i][1]["sql"]} for i in pending]
             try:
-                client.add_example(question=question, sql=sql)
-                print(f"   ✅ {question}")
-                added += 1
+                if batch:
+                    client.add_examples(batch)
+                for i in pending:
+                    outcomes[i] = (True, [f"   ✅ {flat[i][1]['question']}"])
             except Exception as e:
-                print(f"   ❌ {question} - {str(e)}")
-                failed += 1
+                for i in pending:
+                    outcomes[i] = (False, [f"   ❌ {flat[i][1]['question']} - {str(e)}"])
+        else:
+            for i, outcome in zip(pending, pool.map(lambda i: _add_one(client, flat[i][1]), pending)):
+                outcomes[i] = outcome
+    
+    # Print after the pool joins so output stays grouped by category
+    current_category = None
+    for (category, _), (ok, lines) in zip(flat, outcomes):
+        if category != current_category:
+            print(f"\n📂 Category: {category}")
+            current_category = category
+        
+        print("\n".join(lines))
+        if ok:
+            added += 1
+        else:
+            failed += 1
     
     print(f"\n📊 Summary: {added} added, {failed} failed")
     return {"added": added, "failed": failed}
@@ -223,38 +415,63 @@ def add_examples_with_validation(
 add_examples_with_validation(client, FEWSHOT_EXAMPLES, validate=False)
 
 # %% Extract examples from .pbip (Power BI Project)
-def extract_examples_from_pbip(pbip_path: str) -> List[Dict]:
+# Stream-parse measures when ijson is installed
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+def _find_report_extensions(root: str) -> Iterator[str]:
+    """Yield every reportExtensions.json path under root"""
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _find_report_extensions(entry.path)
+            elif entry.name == "reportExtensions.json":
+                yield entry.path
+
+def _iter_measures(extensions_path: str) -> Iterator[Dict]:
+    """Yield measures from a reportExtensions.json one at a time"""
+    with open(extensions_path, "rb") as f:
+        if IJSON_AVAILABLE:
+            yield from ijson.items(f, "measures.item")
+        else:
+            yield from json.load(f).get("measures", [])
+
+def extract_examples_from_pbip(pbip_path: str) -> Iterator[Dict]:
     """
     Extract DAX measures from .pbip and convert to SQL examples.
     
+    Walks the report folder for reportExtensions.json files and yields
+    examples lazily; wrap in list() if you need them all at once.
+    
     Args:
         pbip_path: Path to the .pbip report folder
     
-    Returns:
-        List of example dictionaries
+    Yields:
+        Example dictionaries
     """
-    from pathlib import Path
+    if not os.path.isdir(pbip_path):
+        return
     
-    examples = []
-    report_path = Path(pbip_path)
-    
-    # Read reportExtensions.json for measures
-    extensions_path = report_path / "reportExtensions.json"
-    if extensions_path.exists():
-        with open(extensions_path) as f:
-            extensions = json.load(f)
+    for extensions_path in _find_report_extensions(pbip_path):
+        for measure in _iter_measures(extensions_path):
+            # A nameless measure can't become a SQL alias
+            name = measure.get("name", "")
+            if not name:
+                continue
             
-        for measure in extensions.get("measures", []):
-            # Convert DAX to SQL (simplified example)
-            if "DISTINCTCOUNT" in measure.get("expression", ""):
-                examples.append({
-                    "question": f"How many {measure['name'].lower()}?",
-                    "sql": f"SELECT COUNT(DISTINCT column) AS {measure['name']} FROM dbo.table",
-                    "source": "pbip",
-                    "original_dax": measure["expression"]
-                })
-    
-    return examples
+            # Convert DAX to SQL with the shared .pbip converter
+            example = convert_dax_to_example(name, measure.get("expression", ""))
+            
+            # Skip unconvertible measures and those already covered by a
+            # hand-written example
+            if example is None or is_known_example(example["sql"]):
+                continue
+            
+            example["source"] = "pbip"
+            yield example
 
 # %% Publish agent with examples
 def publish_agent(client: FabricDataAgentClient):
@@ -12,18 +12,25 @@
 # - Test conversation history
 
 # %% Setup
-import json
+import asyncio
+import contextlib
+import io
+import itertools
+import pprint
+import sys
+import textwrap
+from collections.abc import Sized
 from typing import Optional
 
-with open("../config/agent_config.json", "r") as f:
-    CONFIG = json.load(f)
+sys.path.append("..")
+from utils.config import load_config
+
+CONFIG = load_config()
 
 from fabric_data_agent_sdk import FabricDataAgentClient
+from utils.agent import get_client
 
-client = FabricDataAgentClient(
-    workspace_id=CONFIG["workspace_id"],
-    agent_id=CONFIG["agent_id"]
-)
+client = get_client(CONFIG["workspace_id"], CONFIG["agent_id"])
 
 print(f"✅ Connected to agent: {client.agent_name}")
 
@@ -32,6 +39,9 @@ def query_agent(client: FabricDataAgentClient, question: str, verbose: bool = Tr
     """
     Send a natural language question to the Data Agent.
     
+    Uses the SDK's streaming query when available so the preview only
+    materializes the rows it prints.
+    
     Args:
         client: The FabricDataAgentClient instance
         question: Natural language question
@@ -45,17 +55,39 @@ def query_agent(client: FabricDataAgentClient, question: str, verbose: bool = Tr
         print("-" * 50)
     
     try:
-        response = client.query(question)
+        if hasattr(client, "query_stream"):
+            response = client.query_stream(question)
+        else:
+            response = client.query(question)
         
         if verbose:
             print(f"📝 Generated SQL:")
             print(f"   {response.get('sql', 'N/A')}")
             print(f"\n📊 Result Preview:")
-            if response.get('data'):
-                for i, row in enumerate(response['data'][:5]):
-                    print(f"   {row}")
-                if len(response['data']) > 5:
-                    print(f"   ... and {len(response['data']) - 5} more rows")
+            rows = response.get('data')
+            lazy = rows is not None and not isinstance(rows, Sized)
+            if lazy:
+                rows = iter(rows)
+            
+            # Only pull the rows being previewed from a lazy result
+            head = list(itertools.islice(rows, 5)) if rows is not None else []
+            
+            if lazy:
+                # Put the previewed rows back in front so callers still get every row
+                response['data'] = itertools.chain(head, rows)
+            
+            if head:
+                # Format the preview into one buffer for a single write
+                buf = io.StringIO()
+                pprint.pprint(head, stream=buf, width=120)
+                
+                row_count = response.get('row_count')
+                if row_count is None and isinstance(rows, Sized):
+                    row_count = len(rows)
+                if row_count is not None and row_count > 5:
+                    buf.write(f"... and {row_count - 5} more rows\n")
+                
+                sys.stdout.write(textwrap.indent(buf.getvalue(), "   "))
             print(f"\n⏱️ Execution time: {response.get('execution_time', 'N/A')}ms")
         
         return response
@@ -116,28 +148,64 @@ def get_conversation_history(client: FabricDataAgentClient, limit: int = 10):
 # get_conversation_history(client)
 
 # %% Interactive Testing Mode
-def interactive_mode(client: FabricDataAgentClient):
+# prompt_toolkit lets the next question be typed while earlier ones run. It
+# reads the process's own terminal, so it is only used when stdin is a TTY;
+# notebook kernels (which ship prompt_toolkit via IPython) use input() instead.
+try:
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.patch_stdout import patch_stdout
+    PROMPT_TOOLKIT_AVAILABLE = True
+except ImportError:
+    PROMPT_TOOLKIT_AVAILABLE = False
+
+async def query_agent_async(client: FabricDataAgentClient, question: str, verbose: bool = True) -> dict:
+    """Run query_agent on a worker thread so the event loop stays responsive"""
+    return await asyncio.to_thread(query_agent, client, question, verbose)
+
+async def interactive_mode(client: FabricDataAgentClient):
     """
     Start an interactive Q&A session with the agent.
     Press 'quit' to exit.
+    
+    Each question is dispatched in the background, so several can be in
+    flight at once. Pending questions finish before the session ends.
     """
     print("\n🤖 Interactive Mode Started")
     print("   Type your questions below. Type 'quit' to exit.\n")
     
-    while True:
-        question = input("You: ").strip()
-        
-        if question.lower() in ['quit', 'exit', 'q']:
-            print("👋 Goodbye!")
-            break
-        
-        if not question:
-            continue
+    use_prompt_toolkit = PROMPT_TOOLKIT_AVAILABLE and sys.stdin is not None and sys.stdin.isatty()
+    
+    if use_prompt_toolkit:
+        session = PromptSession()
+        read_question = lambda: session.prompt_async("You: ")
+        output_guard = patch_stdout()
+    else:
+        read_question = lambda: asyncio.to_thread(input, "You: ")
+        output_guard = contextlib.nullcontext()
+    
+    in_flight = set()
+    
+    with output_guard:
+        while True:
+            question = (await read_question()).strip()
+            
+            if question.lower() in ['quit', 'exit', 'q']:
+                break
             
-        query_agent(client, question)
+            if not question:
+                continue
+            
+            task = asyncio.create_task(query_agent_async(client, question))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        
+        if in_flight:
+            await asyncio.gather(*in_flight)
+    
+    print("👋 Goodbye!")
 
-# Uncomment to start interactive mode
-# interactive_mode(client)
+# Uncomment to start interactive mode (notebooks support top-level await)
+# await interactive_mode(client)
 
 # %%
 print("\n🎉 Query testing complete! Proceed to 05_Accuracy_Testing notebook.")
@@ -12,20 +12,26 @@
 # to validate that the Data Agent's SQL produces correct results.
 
 # %% Setup
+import functools
 import json
+import math
+import sys
+import threading
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Literal, Optional, Tuple
 from dataclasses import dataclass
 
-with open("../config/agent_config.json", "r") as f:
-    CONFIG = json.load(f)
+sys.path.append("..")
+from utils.config import load_config
+
+CONFIG = load_config()
 
 from fabric_data_agent_sdk import FabricDataAgentClient
+from utils.agent import get_client
 
-client = FabricDataAgentClient(
-    workspace_id=CONFIG["workspace_id"],
-    agent_id=CONFIG["agent_id"]
-)
+client = get_client(CONFIG["workspace_id"], CONFIG["agent_id"])
 
 # Import sempy for DAX execution
 try:
@@ -37,52 +43,80 @@ except ImportError:
 
 # %% Configuration
 SEMANTIC_MODEL_NAME = "Your Semantic Model"  # Power BI dataset name
-TOLERANCE = 0.01  # 1% tolerance for numeric comparisons
+# 1% tolerance for numeric comparisons. Set to 0 for exact mode, where test
+# cases marked "dtype": "int" in test_cases.json are compared directly.
+TOLERANCE = 0.01
 
 # %% Test Case Data Class
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TestCase:
     """Represents a single accuracy test case"""
     question: str
     expected_dax: str
     metric_name: str
     description: Optional[str] = None
+    expected_dtype: Literal["int", "float"] = "float"
+
+# %% Load Test Cases
+# Test cases live in config/test_cases.json and are parsed once per kernel
+TEST_CASES_PATH = "../config/test_cases.json"
 
-# %% Define Test Cases
-# Load from config or define inline
-TEST_CASES = [
-    TestCase(
-        question="How many total users?",
-        expected_dax='EVALUATE ROW("TotalUsers", DISTINCTCOUNT(UsageMetrics[UserId]))',
-        metric_name="TotalUsers",
-        description="Count of unique users"
-    ),
-    TestCase(
-        question="What is the average satisfaction rate?",
-        expected_dax='EVALUATE ROW("AvgSatisfaction", AVERAGE(UsageMetrics[SatisfactionRate]))',
-        metric_name="AvgSatisfaction",
-        description="Average satisfaction score"
-    ),
-    TestCase(
-        question="What is the total session count?",
-        expected_dax='EVALUATE ROW("TotalSessions", SUM(UsageMetrics[Sessions]))',
-        metric_name="TotalSessions",
-        description="Sum of all sessions"
-    ),
-    TestCase(
-        question="How many regions do we have?",
-        expected_dax='EVALUATE ROW("RegionCount", DISTINCTCOUNT(UsageMetrics[Region]))',
-        metric_name="RegionCount",
-        description="Count of unique regions"
+@functools.lru_cache(maxsize=1)
+def load_test_cases(path: str = TEST_CASES_PATH) -> Tuple[TestCase, ...]:
+    """
+    Load accuracy test cases from a JSON file.
+    
+    Args:
+        path: Path to the test case definitions
+    
+    Returns:
+        Tuple of TestCase objects
+    """
+    with open(path) as f:
+        test_data = json.load(f)
+    
+    return tuple(
+        TestCase(
+            question=tc["question"],
+            expected_dax=tc["dax"],
+            metric_name=tc["metric"],
+            description=tc.get("description"),
+            expected_dtype=tc.get("dtype", "float")
+        )
+        for tc in test_data
     )
-]
 
-# Save test cases to config
-with open("../config/test_cases.json", "w") as f:
-    test_data = [{"question": tc.question, "dax": tc.expected_dax, "metric": tc.metric_name} for tc in TEST_CASES]
-    json.dump(test_data, f, indent=2)
+TEST_CASES = load_test_cases()
+print(f"📋 Loaded {len(TEST_CASES)} test case(s)")
+
+# %% Tolerance Comparison
+def tolerance_mask(agent_values, expected_values, tolerance: float) -> np.ndarray:
+    """
+    Element-wise relative tolerance check over whole arrays.
+    
+    A value matches when |agent - expected| / |expected| <= tolerance, or when
+    expected is zero and agent is zero too. NaN matches NaN.
+    
+    Args:
+        agent_values: Agent result values (scalar or array-like)
+        expected_values: Ground truth values, same shape as agent_values
+        tolerance: Acceptable difference ratio
+    
+    Returns:
+        Boolean array of matches
+    """
+    agent = np.asarray(agent_values, dtype=np.float64)
+    expected = np.asarray(expected_values, dtype=np.float64)
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        within = np.abs(agent - expected) <= tolerance * np.abs(expected)
+    
+    return np.where(expected == 0, agent == 0, within) | (np.isnan(agent) & np.isnan(expected))
 
 # %% Accuracy Tester Class
+# Results are stored column-wise: one list per field, one entry per test case
+RESULT_COLUMNS = ("question", "metric", "expected_dax", "status", "agent_value", "expected_value", "difference", "error")
+
 class ReportBasedAccuracyTester:
     """
     Test Data Agent accuracy by comparing against Power BI report (DAX) ground truth.
@@ -98,14 +132,27 @@ class ReportBasedAccuracyTester:
         """
         self.agent = agent_client
         self.dataset = semantic_model
-        self.results = []
+        self.results = self._empty_results()
+        self._results_lock = threading.Lock()
+    
+    @staticmethod
+    def _empty_results() -> Dict[str, List]:
+        """Create an empty columnar result store"""
+        return {column: [] for column in RESULT_COLUMNS}
     
-    def query_report_dax(self, dax_query: str) -> pd.DataFrame:
+    def _append_result(self, result: Dict):
+        """Append one result row across all result columns"""
+        for column in RESULT_COLUMNS:
+            self.results[column].append(result.get(column))
+    
+    def query_report_dax(self, dax_query: str, lines: Optional[List[str]] = None) -> pd.DataFrame:
         """
         Execute DAX query against the Power BI semantic model.
         
         Args:
             dax_query: The DAX query string
+            lines: Output lines to append to instead of printing, so
+                concurrent test cases don't interleave their output
         
         Returns:
             DataFrame with query results
@@ -113,15 +160,17 @@ class ReportBasedAccuracyTester:
         if not SEMPY_AVAILABLE:
             raise RuntimeError("sempy not available")
         
-        print(f"   📝 Executing DAX: {dax_query[:80]}...")
+        log = print if lines is None else lines.append
+        
+        log(f"   📝 Executing DAX: {dax_query[:80]}...")
         
         df = fabric.evaluate_dax(
             dataset=self.dataset,
             dax_string=dax_query
         )
         
-        print(f"   📊 DAX Result Shape: {df.shape}")
-        print(f"   📊 DAX Result:\n{df}")
+        log(f"   📊 DAX Result Shape: {df.shape}")
+        log(f"   📊 DAX Result:\n{df}")
         
         return df
     
@@ -136,6 +185,41 @@ class ReportBasedAccuracyTester:
                 return float(list(first_row.values())[0])
         return 0.0
     
+    def _compare_frames(self, agent_df: pd.DataFrame, expected_df: pd.DataFrame, tolerance: float) -> bool:
+        """
+        Compare full result frames, numeric columns within tolerance.
+        
+        DAX column names (e.g. 'UsageMetrics[Region]') rarely match SQL aliases,
+        so columns are matched by position and rows by sorted content.
+        """
+        if agent_df.shape != expected_df.shape:
+            return False
+        
+        agent_df = agent_df.set_axis(expected_df.columns, axis=1)
+        numeric_cols = list(expected_df.select_dtypes("number").columns)
+        key_cols = [c for c in expected_df.columns if c not in numeric_cols]
+        
+        agent_df[numeric_cols] = agent_df[numeric_cols].astype(np.float64)
+        for col in key_cols:
+            if pd.api.types.is_datetime64_any_dtype(expected_df[col]):
+                agent_df[col] = pd.to_datetime(agent_df[col])
+        agent_df[key_cols] = agent_df[key_cols].astype(str)
+        expected_df = expected_df.astype({col: str for col in key_cols})
+        
+        # Canonicalize row order so ORDER BY differences don't matter
+        sort_cols = key_cols + numeric_cols
+        agent_df = agent_df.sort_values(sort_cols, ignore_index=True)
+        expected_df = expected_df.sort_values(sort_cols, ignore_index=True)
+        
+        if not agent_df[key_cols].equals(expected_df[key_cols]):
+            return False
+        
+        return bool(tolerance_mask(
+            agent_df[numeric_cols].to_numpy(dtype=np.float64),
+            expected_df[numeric_cols].to_numpy(dtype=np.float64),
+            tolerance
+        ).all())
+    
     def test_single_case(self, test_case: TestCase, tolerance: float = 0.01) -> Dict:
         """
         Run a single accuracy test.
@@ -147,59 +231,96 @@ class ReportBasedAccuracyTester:
         Returns:
             Dictionary with test results
         """
-        print(f"\n🧪 Testing: {test_case.question}")
+        result, lines = self._run_case(test_case, tolerance)
+        print("\n".join(lines))
+        
+        with self._results_lock:
+            self._append_result(result)
+        return result
+    
+    def _run_case(self, test_case: TestCase, tolerance: float) -> Tuple[Dict, List[str]]:
+        """Run one test case, returning its result and output lines unprinted"""
+        lines = [f"\n🧪 Testing: {test_case.question}"]
         
         result = {
             "question": test_case.question,
             "metric": test_case.metric_name,
+            "expected_dax": test_case.expected_dax,
             "status": "unknown",
             "agent_value": None,
             "expected_value": None,
-            "difference": None
+            "difference": None,
+            "error": None
         }
         
         try:
-            # Get agent response
-            agent_response = self.agent.query(test_case.question)
-            agent_value = self.extract_numeric_value(agent_response)
-            result["agent_value"] = agent_value
-            print(f"   🤖 Agent Result: {agent_value:,.2f}")
-            
-            # Get Power BI ground truth
-            dax_result = self.query_report_dax(test_case.expected_dax)
-            expected_value = float(dax_result.iloc[0, 0])
-            result["expected_value"] = expected_value
-            print(f"   📊 Report Result: {expected_value:,.2f}")
+            # Agent response and Power BI ground truth are independent, so
+            # issue both requests at once
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                agent_future = pool.submit(self.agent.query, test_case.question)
+                dax_future = pool.submit(self.query_report_dax, test_case.expected_dax, lines)
+                agent_response = agent_future.result()
+                dax_result = dax_future.result()
             
-            # Compare
-            if expected_value == 0:
-                is_match = agent_value == 0
+            if dax_result.shape != (1, 1):
+                # Multi-row/multi-column ground truth: compare whole frames
+                agent_df = pd.DataFrame(
+                    agent_response.get('data') or [],
+                    columns=agent_response.get('columns')
+                )
+                lines.append(f"   🤖 Agent Result Shape: {agent_df.shape}")
+                is_match = self._compare_frames(agent_df, dax_result, tolerance)
             else:
-                difference = abs(agent_value - expected_value) / expected_value
-                result["difference"] = difference
-                is_match = difference <= tolerance
+                agent_value = self.extract_numeric_value(agent_response)
+                result["agent_value"] = agent_value
+                lines.append(f"   🤖 Agent Result: {agent_value:,.2f}")
+                
+                expected_value = float(dax_result.iloc[0, 0])
+                result["expected_value"] = expected_value
+                lines.append(f"   📊 Report Result: {expected_value:,.2f}")
+                
+                # Compare: exact counts need no relative-difference math. The
+                # values are compared untruncated so 41.6 never matches 41, and
+                # NaN matches NaN as in tolerance_mask.
+                if test_case.expected_dtype == "int" and tolerance == 0:
+                    is_match = agent_value == expected_value or (
+                        math.isnan(agent_value) and math.isnan(expected_value)
+                    )
+                else:
+                    if expected_value != 0:
+                        result["difference"] = abs(agent_value - expected_value) / abs(expected_value)
+                    is_match = bool(tolerance_mask(agent_value, expected_value, tolerance))
             
             if is_match:
                 result["status"] = "pass"
-                print(f"   ✅ PASS")
+                lines.append(f"   ✅ PASS")
             else:
                 result["status"] = "fail"
-                print(f"   ❌ FAIL (difference: {result['difference']:.2%})")
+                if result["difference"] is not None:
+                    lines.append(f"   ❌ FAIL (difference: {result['difference']:.2%})")
+                else:
+                    lines.append(f"   ❌ FAIL")
                 
         except Exception as e:
             result["status"] = "error"
             result["error"] = str(e)
-            print(f"   ⚠️ ERROR: {str(e)}")
+            lines.append(f"   ⚠️ ERROR: {str(e)}")
         
-        self.results.append(result)
-        return result
+        return result, lines
     
-    def run_test_suite(self, test_cases: List[TestCase]) -> Dict:
+    def run_test_suite(
+        self,
+        test_cases: List[TestCase],
+        max_workers: int = 8,
+        tolerance: float = TOLERANCE
+    ) -> Dict:
         """
-        Run all test cases and return summary.
+        Run all test cases concurrently and return summary.
         
         Args:
             test_cases: List of TestCase objects
+            max_workers: Maximum number of test cases run at once
+            tolerance: Acceptable difference ratio passed to each test
         
         Returns:
             Dictionary with test suite summary
@@ -208,16 +329,25 @@ class ReportBasedAccuracyTester:
         print("📊 RUNNING ACCURACY TEST SUITE")
         print("=" * 60)
         
-        self.results = []
+        self.results = self._empty_results()
         
-        for test_case in test_cases:
-            self.test_single_case(test_case)
+        if test_cases:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(test_cases))) as pool:
+                outcomes = list(pool.map(lambda tc: self._run_case(tc, tolerance), test_cases))
+            
+            # Print and record after the pool joins, in test-case order, so
+            # each case's output stays together
+            for result, lines in outcomes:
+                print("\n".join(lines))
+                self._append_result(result)
         
         # Calculate summary
-        passed = sum(1 for r in self.results if r["status"] == "pass")
-        failed = sum(1 for r in self.results if r["status"] == "fail")
-        errors = sum(1 for r in self.results if r["status"] == "error")
-        total = len(self.results)
+        status = np.asarray(self.results["status"], dtype=str)
+        counts = dict(zip(*np.unique(status, return_counts=True)))
+        passed = int(counts.get("pass", 0))
+        failed = int(counts.get("fail", 0))
+        errors = int(counts.get("error", 0))
+        total = len(status)
         
         accuracy = passed / total if total > 0 else 0
         
@@ -241,7 +371,11 @@ class ReportBasedAccuracyTester:
     
     def get_failures(self) -> List[Dict]:
         """Get list of failed test cases"""
-        return [r for r in self.results if r["status"] == "fail"]
+        status = np.asarray(self.results["status"], dtype=str)
+        return [
+            {column: self.results[column][i] for column in RESULT_COLUMNS}
+            for i in np.flatnonzero(status == "fail")
+        ]
 
 # %% Run Accuracy Tests
 # Note: This requires sempy and a valid Power BI semantic model connection
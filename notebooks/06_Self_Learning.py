@@ -15,18 +15,23 @@
 
 # %% Setup
 import json
-from typing import Dict, List, Optional
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 
-with open("../config/agent_config.json", "r") as f:
-    CONFIG = json.load(f)
+sys.path.append("..")
+from utils.config import load_config
+
+CONFIG = load_config()
 
 from fabric_data_agent_sdk import FabricDataAgentClient
+from utils.agent import get_client
+from utils.pbip_extractor import convert_dax_to_example
+from utils.sql_validator import validate_sql_queries_batch, validate_sql_syntax
 
-client = FabricDataAgentClient(
-    workspace_id=CONFIG["workspace_id"],
-    agent_id=CONFIG["agent_id"]
-)
+client = get_client(CONFIG["workspace_id"], CONFIG["agent_id"])
 
 print(f"✅ Connected to agent: {client.agent_name}")
 
@@ -55,10 +60,29 @@ def load_failures() -> List[Dict]:
 failures = load_failures()
 
 # %% SQL Generation Strategies
+# Predefined SQL per metric for the 'template' strategy
+_METRIC_TEMPLATES: Dict[str, str] = {
+    "TotalUsers": "SELECT COUNT(DISTINCT UserId) AS TotalUsers FROM dbo.UsageMetrics",
+    "AvgSatisfaction": "SELECT AVG(SatisfactionRate) AS AvgSatisfaction FROM dbo.UsageMetrics",
+    "TotalSessions": "SELECT SUM(Sessions) AS TotalSessions FROM dbo.UsageMetrics",
+    "RegionCount": "SELECT COUNT(DISTINCT Region) AS RegionCount FROM dbo.UsageMetrics"
+}
+
+# Unfilled lowercase placeholders emitted by the old templates; must never reach the agent
+_PLACEHOLDER_RE = re.compile(r'\bdbo\.table\b|\bcolumn\b')
+
+def _normalize_question(question: str) -> str:
+    """Normalize a question for comparison"""
+    return question.strip().lower()
+
 def generate_correct_sql(failure: Dict, strategy: str = "template") -> Optional[str]:
     """
     Generate correct SQL for a failed query.
     
+    The 'template' strategy is a single dict lookup; 'dax_convert' results are
+    memoized per DAX expression by convert_dax_to_example, so neither needs a
+    cache here.
+    
     Args:
         failure: The failed test case dictionary
         strategy: Generation strategy ('template', 'dax_convert', 'manual')
@@ -66,37 +90,60 @@ def generate_correct_sql(failure: Dict, strategy: str = "template") -> Optional[
     Returns:
         Correct SQL string or None
     """
-    question = failure["question"]
     metric = failure.get("metric", "")
     
     if strategy == "template":
         # Use predefined templates based on metric type
-        templates = {
-            "TotalUsers": "SELECT COUNT(DISTINCT UserId) AS TotalUsers FROM dbo.UsageMetrics",
-            "AvgSatisfaction": "SELECT AVG(SatisfactionRate) AS AvgSatisfaction FROM dbo.UsageMetrics",
-            "TotalSessions": "SELECT SUM(Sessions) AS TotalSessions FROM dbo.UsageMetrics",
-            "RegionCount": "SELECT COUNT(DISTINCT Region) AS RegionCount FROM dbo.UsageMetrics"
-        }
-        return templates.get(metric)
+        return _METRIC_TEMPLATES.get(metric)
     
     elif strategy == "dax_convert":
-        # Convert DAX expression to SQL (simplified)
-        dax = failure.get("expected_dax", "")
-        
-        if "DISTINCTCOUNT" in dax:
-            # Extract table and column from DAX
-            # DAX: DISTINCTCOUNT(UsageMetrics[UserId])
-            # SQL: SELECT COUNT(DISTINCT UserId) FROM dbo.UsageMetrics
-            return f"SELECT COUNT(DISTINCT column) AS {metric} FROM dbo.table"
-        
-        elif "AVERAGE" in dax:
-            return f"SELECT AVG(column) AS {metric} FROM dbo.table"
-        
-        elif "SUM" in dax:
-            return f"SELECT SUM(column) AS {metric} FROM dbo.table"
+        # Convert the ground-truth DAX with the shared .pbip converter
+        example = convert_dax_to_example(metric, failure.get("expected_dax", ""))
+        return example["sql"] if example else None
     
     return None
 
+# %% Add Examples
+def add_examples(
+    client: FabricDataAgentClient,
+    examples: List[Tuple[str, str]],
+    max_workers: int = 8
+) -> List[Optional[str]]:
+    """
+    Add (question, sql) examples in as few requests as the SDK allows.
+    
+    Uses a single add_examples call when the SDK offers one, otherwise
+    concurrent add_example calls. Nothing here publishes the agent.
+    
+    Args:
+        client: The FabricDataAgentClient instance
+        examples: List of (question, sql) pairs
+        max_workers: Maximum number of concurrent requests
+    
+    Returns:
+        Error message per example, or None where it was added
+    """
+    if not examples:
+        return []
+    
+    if hasattr(client, "add_examples"):
+        try:
+            client.add_examples([{"question": q, "sql": sql} for q, sql in examples])
+            return [None] * len(examples)
+        except Exception as e:
+            return [str(e)] * len(examples)
+    
+    def add_one(example: Tuple[str, str]) -> Optional[str]:
+        question, sql = example
+        try:
+            client.add_example(question=question, sql=sql)
+            return None
+        except Exception as e:
+            return str(e)
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(add_one, examples))
+
 # %% Self-Learning Function
 def self_learn_from_failures(
     client: FabricDataAgentClient,
@@ -119,8 +166,26 @@ def self_learn_from_failures(
     
     learned = 0
     skipped = 0
+    candidates = []
     
+    # Skip repeated failures and questions the agent already has examples for
+    seen = {
+        _normalize_question(example["question"])
+        for example in (getattr(client, "examples", None) or [])
+        if isinstance(example, dict) and "question" in example
+    }
+    unique_failures = []
     for failure in failures:
+        key = _normalize_question(failure["question"])
+        if key in seen:
+            continue
+        seen.add(key)
+        unique_failures.append(failure)
+    
+    if len(unique_failures) < len(failures):
+        print(f"⏭️ Skipped {len(failures) - len(unique_failures)} duplicate or already-learned questions")
+    
+    for failure in unique_failures:
         question = failure["question"]
         print(f"\n📚 Learning: {question}")
         
@@ -134,26 +199,44 @@ def self_learn_from_failures(
         
         print(f"   📝 Generated SQL: {correct_sql[:60]}...")
         
-        # Optionally validate
-        if validate:
-            # validation_result = validate_sql_query(correct_sql)
-            # if not validation_result["valid"]:
-            #     print(f"   ❌ Invalid SQL: {validation_result['error']}")
-            #     skipped += 1
-            #     continue
-            pass
+        # Cheap local checks before any round-trip to the endpoint or agent
+        syntax = validate_sql_syntax(correct_sql)
+        if not syntax["valid"]:
+            print(f"   ❌ Skipped - {'; '.join(syntax['issues'])}")
+            skipped += 1
+            continue
         
-        # Add as new example
-        try:
-            client.add_example(
-                question=question,
-                sql=correct_sql
-            )
-            print(f"   ✅ Added as new example")
+        if _PLACEHOLDER_RE.search(correct_sql):
+            print(f"   ❌ Skipped - SQL still contains template placeholders")
+            skipped += 1
+            continue
+        
+        candidates.append((question, correct_sql))
+    
+    # Optionally validate, all candidates in one round-trip
+    if validate and candidates:
+        validation = validate_sql_queries_batch(
+            [sql for _, sql in candidates],
+            CONFIG["sql_endpoint"],
+            CONFIG["database"]
+        )
+        
+        valid_candidates = []
+        for (question, correct_sql), result in zip(candidates, validation):
+            if result["valid"]:
+                valid_candidates.append((question, correct_sql))
+            else:
+                print(f"\n   ❌ Invalid SQL for '{question}': {result['error']}")
+                skipped += 1
+        candidates = valid_candidates
+    
+    # Add as new examples
+    for (question, _), error in zip(candidates, add_examples(client, candidates)):
+        if error is None:
+            print(f"   ✅ Added as new example: {question}")
             learned += 1
-            
-        except Exception as e:
-            print(f"   ❌ Failed to add: {str(e)}")
+        else:
+            print(f"   ❌ Failed to add '{question}': {error}")
             skipped += 1
     
     print(f"\n📊 Learning Summary:")
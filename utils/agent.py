@@ -0,0 +1,29 @@
+"""
+Agent Client Utility
+Share one authenticated Data Agent client per workspace/agent across notebooks.
+"""
+
+import functools
+
+from fabric_data_agent_sdk import FabricDataAgentClient
+
+
+@functools.lru_cache(maxsize=4)
+def get_client(workspace_id: str, agent_id: str) -> FabricDataAgentClient:
+    """
+    Get a connected client for an existing agent, reusing it if already created.
+
+    Constructing a client acquires a token and fetches agent metadata, so
+    notebooks chained with %run share a single instance per agent.
+
+    Args:
+        workspace_id: The Fabric workspace ID
+        agent_id: The Data Agent ID
+
+    Returns:
+        FabricDataAgentClient instance
+    """
+    return FabricDataAgentClient(
+        workspace_id=workspace_id,
+        agent_id=agent_id
+    )
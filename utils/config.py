@@ -0,0 +1,58 @@
+"""
+Config Utility
+Load and save the agent configuration shared by the notebooks.
+"""
+
+import functools
+import json
+import os
+from pathlib import Path
+from typing import Dict, Union
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parent.parent / "config" / "agent_config.json"
+
+
+@functools.lru_cache(maxsize=1)
+def _read_config(path: str, mtime_ns: int) -> Dict:
+    """Parse the config file; mtime_ns is part of the cache key only."""
+    data = Path(path).read_bytes()
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load_config(path: Union[str, Path] = DEFAULT_CONFIG_PATH) -> Dict:
+    """
+    Load the agent configuration, re-parsing only when the file changes.
+
+    Args:
+        path: Path to agent_config.json
+
+    Returns:
+        Configuration dictionary (a copy callers may modify)
+    """
+    path = os.fspath(path)
+    mtime_ns = os.stat(path).st_mtime_ns
+    return dict(_read_config(path, mtime_ns))
+
+
+def save_config(config: Dict, path: Union[str, Path] = DEFAULT_CONFIG_PATH) -> None:
+    """
+    Write the agent configuration as indented JSON.
+
+    Args:
+        config: Configuration dictionary
+        path: Path to agent_config.json
+    """
+    if ORJSON_AVAILABLE:
+        Path(path).write_bytes(orjson.dumps(config, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, "w") as f:
+            json.dump(config, f, indent=2)
@@ -3,16 +3,112 @@ PBIP Extractor Utility
 Extract knowledge from Power BI Project (.pbip) files to create agent examples.
 """
 
+import functools
 import json
+import mmap
+import os
 import re
+import types
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import BinaryIO, Dict, List, Mapping, Optional
+
+# Stream-parse report.json when ijson is installed
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+    _JSON_ERRORS = (json.JSONDecodeError, ijson.JSONError)
+except ImportError:
+    IJSON_AVAILABLE = False
+    _JSON_ERRORS = (json.JSONDecodeError,)
+
+# Faster JSON parsing when orjson is installed
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+    _loads = orjson.loads
+except ImportError:
+    ORJSON_AVAILABLE = False
+    _loads = json.loads
+
+# Pattern: measure Name = DAX_EXPRESSION (continuation lines are indented).
+# Bytes \w is ASCII-only, so names also accept any UTF-8 multi-byte sequence
+# (e.g. "Umsätze") to match what the str pattern's Unicode \w accepted.
+_TMDL_MEASURE_RE = re.compile(rb'measure\s+((?:\w|[\x80-\xff])+)\s*=\s*([^\n]+(?:\n\s+[^\n]+)*)', re.MULTILINE)
+
+# Pattern: the first DAX function in a measure, with its Table[Column] (or
+# 'Table'[Column]) argument when it is a plain aggregation. CALCULATE is
+# matched so it can be rejected: its filter arguments can't be expressed
+# by a single aggregate.
+_DAX_AGG_RE = re.compile(
+    r"\b(?P<op>CALCULATE|DISTINCTCOUNT|SUM|AVERAGE|COUNT|MIN|MAX)\s*\(\s*"
+    r"(?:'?(?P<table>\w+)'?\[(?P<column>\w+)\]\s*\))?",
+    re.IGNORECASE
+)
+
+# DAX aggregation -> (question template, SQL template)
+_DAX_OP_TO_EXAMPLE = {
+    "DISTINCTCOUNT": ("How many total {label}?", "SELECT COUNT(DISTINCT {column}) AS {name} FROM dbo.{table}"),
+    "SUM": ("What is the total {label}?", "SELECT SUM({column}) AS {name} FROM dbo.{table}"),
+    "AVERAGE": ("What is the average {label}?", "SELECT AVG(CAST({column} AS FLOAT)) AS {name} FROM dbo.{table}"),
+    "COUNT": ("How many {label}?", "SELECT COUNT({column}) AS {name} FROM dbo.{table}"),
+    "MAX": ("What is the maximum {label}?", "SELECT MAX({column}) AS {name} FROM dbo.{table}"),
+    "MIN": ("What is the minimum {label}?", "SELECT MIN({column}) AS {name} FROM dbo.{table}"),
+}
+
+
+def _load_extensions(extensions_path: Path) -> Dict:
+    """Read custom measures from reportExtensions.json."""
+    if not extensions_path.exists():
+        return {}
+    
+    with open(extensions_path, 'rb') as f:
+        try:
+            extensions = _loads(f.read())
+            return {"custom_measures": extensions.get("measures", [])}
+        except json.JSONDecodeError:
+            return {}
+
+
+def _load_tmdl(model_tmdl_path: Path) -> Dict:
+    """Read measures from model.tmdl."""
+    return {"measures": extract_measures_from_tmdl(model_tmdl_path)}
+
+
+def _load_model_json(model_json_path: Path) -> Dict:
+    """Read tables and relationships from model.json."""
+    if not model_json_path.exists():
+        return {}
+    
+    with open(model_json_path, 'rb') as f:
+        try:
+            model = _loads(f.read())
+            return {
+                "tables": model.get("tables", []),
+                "relationships": model.get("relationships", [])
+            }
+        except json.JSONDecodeError:
+            return {}
+
+
+def _load_report_json(report_json_path: Path) -> Dict:
+    """Read visual information from report.json."""
+    if not report_json_path.exists():
+        return {}
+    
+    with open(report_json_path, 'rb') as f:
+        try:
+            return {"visuals": extract_visual_info(f)}
+        except _JSON_ERRORS:
+            return {}
 
 
 def extract_knowledge_from_pbip(pbip_path: str) -> Dict:
     """
     Extract business logic and measures from a .pbip report folder.
     
+    The report files are independent, so they are read concurrently.
+    
     Args:
         pbip_path: Path to the .pbip report folder
     
@@ -33,40 +129,21 @@ def extract_knowledge_from_pbip(pbip_path: str) -> Dict:
         "visuals": []
     }
     
-    # Read reportExtensions.json for custom measures
-    extensions_path = report_path / "reportExtensions.json"
-    if extensions_path.exists():
-        with open(extensions_path, encoding='utf-8') as f:
-            try:
-                extensions = json.load(f)
-                knowledge["custom_measures"] = extensions.get("measures", [])
-            except json.JSONDecodeError:
-                pass
-    
-    # Read definition/model.tmdl or model.json for model info
     model_tmdl_path = report_path / "definition" / "model.tmdl"
-    model_json_path = report_path / "definition" / "model.json"
-    
-    if model_tmdl_path.exists():
-        knowledge["measures"] = extract_measures_from_tmdl(model_tmdl_path)
-    elif model_json_path.exists():
-        with open(model_json_path, encoding='utf-8') as f:
-            try:
-                model = json.load(f)
-                knowledge["tables"] = model.get("tables", [])
-                knowledge["relationships"] = model.get("relationships", [])
-            except json.JSONDecodeError:
-                pass
-    
-    # Read report.json for visual information
-    report_json_path = report_path / "definition" / "report.json"
-    if report_json_path.exists():
-        with open(report_json_path, encoding='utf-8') as f:
-            try:
-                report = json.load(f)
-                knowledge["visuals"] = extract_visual_info(report)
-            except json.JSONDecodeError:
-                pass
+    
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [
+            # reportExtensions.json for custom measures
+            pool.submit(_load_extensions, report_path / "reportExtensions.json"),
+            # model.tmdl, or model.json when there is no TMDL, for model info
+            pool.submit(_load_tmdl, model_tmdl_path) if model_tmdl_path.exists()
+            else pool.submit(_load_model_json, report_path / "definition" / "model.json"),
+            # report.json for visual information
+            pool.submit(_load_report_json, report_path / "definition" / "report.json")
+        ]
+        
+        for future in futures:
+            knowledge.update(future.result())
     
     return knowledge
 
@@ -83,42 +160,48 @@ def extract_measures_from_tmdl(tmdl_path: Path) -> List[Dict]:
     """
     measures = []
     
-    with open(tmdl_path, encoding='utf-8') as f:
-        content = f.read()
-    
-    # Simple regex to extract measures
-    # Pattern: measure Name = DAX_EXPRESSION
-    measure_pattern = r'measure\s+(\w+)\s*=\s*([^\n]+(?:\n\s+[^\n]+)*)'
-    
-    matches = re.findall(measure_pattern, content, re.MULTILINE)
-    
-    for name, expression in matches:
-        measures.append({
-            "name": name.strip(),
-            "expression": expression.strip()
-        })
+    # mmap can't map an empty file
+    if os.path.getsize(tmdl_path) == 0:
+        return measures
+    
+    # Scan the mapped bytes directly instead of reading and decoding the file.
+    # Binary mode keeps Windows line endings, so normalize them as text mode would.
+    with open(tmdl_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for match in _TMDL_MEASURE_RE.finditer(mm):
+            measures.append({
+                "name": match.group(1).decode('utf-8').strip(),
+                "expression": match.group(2).decode('utf-8').replace('\r\n', '\n').strip()
+            })
     
     return measures
 
 
-def extract_visual_info(report_json: Dict) -> List[Dict]:
+def extract_visual_info(report_file: BinaryIO) -> List[Dict]:
     """
     Extract visual information from report.json.
     
+    Sections are parsed one at a time when ijson is available, so the rest
+    of the report (themes, filters, bookmarks) is never held in memory.
+    
     Args:
-        report_json: The parsed report.json content
+        report_file: report.json opened in binary mode
     
     Returns:
         List of visual information dictionaries
     """
     visuals = []
     
-    for section in report_json.get("sections", []):
+    if IJSON_AVAILABLE:
+        sections = ijson.items(report_file, "sections.item", use_float=True)
+    else:
+        sections = _loads(report_file.read()).get("sections", [])
+    
+    for section in sections:
         for visual_container in section.get("visualContainers", []):
             config = visual_container.get("config", "{}")
             if isinstance(config, str):
                 try:
-                    config = json.loads(config)
+                    config = _loads(config)
                 except:
                     continue
             
@@ -161,10 +244,37 @@ def create_agent_examples_from_pbip(pbip_knowledge: Dict) -> List[Dict]:
     return examples
 
 
+@functools.lru_cache(maxsize=4096)
+def _convert_dax_cached(measure_name: str, dax_expression: str) -> Optional[Mapping]:
+    """Build the example once per (name, expression); read-only so it can be shared."""
+    match = _DAX_AGG_RE.search(dax_expression)
+    if not match or not match.group("table"):
+        return None
+    
+    templates = _DAX_OP_TO_EXAMPLE.get(match.group("op").upper())
+    if not templates:
+        return None
+    
+    question_template, sql_template = templates
+    
+    return types.MappingProxyType({
+        "question": question_template.format(label=measure_name.lower()),
+        "sql": sql_template.format(
+            column=match.group("column"),
+            name=measure_name,
+            table=match.group("table")
+        ),
+        "source": "pbip_measure",
+        "original_dax": dax_expression
+    })
+
+
 def convert_dax_to_example(measure_name: str, dax_expression: str) -> Optional[Dict]:
     """
     Convert a single DAX measure to a SQL example.
     
+    Repeated (name, expression) pairs are served from a cache.
+    
     Args:
         measure_name: Name of the measure
         dax_expression: DAX expression
@@ -172,81 +282,8 @@ def convert_dax_to_example(measure_name: str, dax_expression: str) -> Optional[D
     Returns:
         Example dictionary or None if conversion not possible
     """
-    dax_upper = dax_expression.upper()
-    
-    # Pattern: DISTINCTCOUNT(Table[Column])
-    if "DISTINCTCOUNT" in dax_upper:
-        match = re.search(r"DISTINCTCOUNT\((\w+)\[(\w+)\]\)", dax_expression, re.IGNORECASE)
-        if match:
-            table, column = match.groups()
-            return {
-                "question": f"How many total {measure_name.lower()}?",
-                "sql": f"SELECT COUNT(DISTINCT {column}) AS {measure_name} FROM dbo.{table}",
-                "source": "pbip_measure",
-                "original_dax": dax_expression
-            }
-    
-    # Pattern: SUM(Table[Column])
-    elif "SUM(" in dax_upper and "SUMX" not in dax_upper:
-        match = re.search(r"SUM\((\w+)\[(\w+)\]\)", dax_expression, re.IGNORECASE)
-        if match:
-            table, column = match.groups()
-            return {
-                "question": f"What is the total {measure_name.lower()}?",
-                "sql": f"SELECT SUM({column}) AS {measure_name} FROM dbo.{table}",
-                "source": "pbip_measure",
-                "original_dax": dax_expression
-            }
-    
-    # Pattern: AVERAGE(Table[Column])
-    elif "AVERAGE(" in dax_upper:
-        match = re.search(r"AVERAGE\((\w+)\[(\w+)\]\)", dax_expression, re.IGNORECASE)
-        if match:
-            table, column = match.groups()
-            return {
-                "question": f"What is the average {measure_name.lower()}?",
-                "sql": f"SELECT AVG(CAST({column} AS FLOAT)) AS {measure_name} FROM dbo.{table}",
-                "source": "pbip_measure",
-                "original_dax": dax_expression
-            }
-    
-    # Pattern: COUNT(Table[Column])
-    elif "COUNT(" in dax_upper and "DISTINCTCOUNT" not in dax_upper:
-        match = re.search(r"COUNT\((\w+)\[(\w+)\]\)", dax_expression, re.IGNORECASE)
-        if match:
-            table, column = match.groups()
-            return {
-                "question": f"How many {measure_name.lower()}?",
-                "sql": f"SELECT COUNT({column}) AS {measure_name} FROM dbo.{table}",
-                "source": "pbip_measure",
-                "original_dax": dax_expression
-            }
-    
-    # Pattern: MAX(Table[Column])
-    elif "MAX(" in dax_upper:
-        match = re.search(r"MAX\((\w+)\[(\w+)\]\)", dax_expression, re.IGNORECASE)
-        if match:
-            table, column = match.groups()
-            return {
-                "question": f"What is the maximum {measure_name.lower()}?",
-                "sql": f"SELECT MAX({column}) AS {measure_name} FROM dbo.{table}",
-                "source": "pbip_measure",
-                "original_dax": dax_expression
-            }
-    
-    # Pattern: MIN(Table[Column])
-    elif "MIN(" in dax_upper:
-        match = re.search(r"MIN\((\w+)\[(\w+)\]\)", dax_expression, re.IGNORECASE)
-        if match:
-            table, column = match.groups()
-            return {
-                "question": f"What is the minimum {measure_name.lower()}?",
-                "sql": f"SELECT MIN({column}) AS {measure_name} FROM dbo.{table}",
-                "source": "pbip_measure",
-                "original_dax": dax_expression
-            }
-    
-    return None
+    example = _convert_dax_cached(measure_name, dax_expression)
+    return dict(example) if example is not None else None
 
 
 if __name__ == "__main__":
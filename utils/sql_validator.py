@@ -3,8 +3,55 @@ SQL Validator Utility
 Validates SQL queries against Fabric SQL Endpoint before adding as examples.
 """
 
+import atexit
+import re
+import threading
+
 import pyodbc
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
+
+
+# Live connections keyed by (sql_endpoint, database, timeout). Opening one runs
+# the full ODBC + Azure AD handshake, so validations reuse them.
+_connections: Dict[Tuple[str, str, int], pyodbc.Connection] = {}
+_connections_lock = threading.Lock()
+
+# Each statement is described inside TRY/CATCH so one bad query yields an
+# error row instead of aborting the rest of the batch
+_DESCRIBE_STATEMENT = (
+    "BEGIN TRY EXEC sys.sp_describe_first_result_set @tsql = ?; END TRY "
+    "BEGIN CATCH SELECT ERROR_MESSAGE() AS error_message; END CATCH;"
+)
+
+# SQL Server accepts at most 2100 parameters per request
+_MAX_BATCH_SIZE = 500
+
+# Every token validate_sql_syntax cares about, found in one scan
+_SQL_TOKEN_RE = re.compile(
+    r"\b(LIMIT|DATE_SUB(?=\()|DATE_ADD(?=\()|DATEADD(?=\()|CURRENT_DATE|GETDATE(?=\(\))"
+    r"|SELECT|INSERT|UPDATE|DELETE)\b",
+    re.IGNORECASE
+)
+
+# Spark SQL token -> (T-SQL token that makes it acceptable, issue message)
+_SPARK_ISSUES = (
+    ("LIMIT", None, "Use 'TOP N' instead of 'LIMIT' for T-SQL"),
+    ("DATE_SUB", None, "Use 'DATEADD(DAY, -N, date)' instead of 'DATE_SUB' for T-SQL"),
+    ("DATE_ADD", "DATEADD", "Use 'DATEADD()' instead of 'DATE_ADD()' for T-SQL"),
+    ("CURRENT_DATE", "GETDATE", "Use 'GETDATE()' or 'CAST(GETDATE() AS DATE)' instead of 'CURRENT_DATE' for T-SQL"),
+)
+
+_DML_TOKENS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+# Spark SQL constructs rewritten by convert_spark_to_tsql, in one alternation
+_SPARK_TO_TSQL_RE = re.compile(
+    r"(?P<limit>\sLIMIT\s+(?P<n>\d+))"
+    r"|(?P<datesub>DATE_SUB\((?P<date>[^,]+),\s*(?P<days>\d+)\))"
+    r"|(?P<curdate>CURRENT_DATE)",
+    re.IGNORECASE
+)
+_CURRENT_DATE_RE = re.compile(r"CURRENT_DATE", re.IGNORECASE)
+_SELECT_RE = re.compile(r"SELECT\s+", re.IGNORECASE)
 
 
 def get_sql_connection(
@@ -34,6 +81,47 @@ def get_sql_connection(
     return pyodbc.connect(connection_string)
 
 
+def _get_conn(sql_endpoint: str, database: str, timeout: int = 30) -> pyodbc.Connection:
+    """Return the cached connection for an endpoint, opening it on first use."""
+    key = (sql_endpoint, database, timeout)
+    
+    with _connections_lock:
+        conn = _connections.get(key)
+        if conn is None:
+            conn = get_sql_connection(sql_endpoint, database, timeout)
+            # Validation only reads; avoid holding implicit transactions open
+            conn.autocommit = True
+            _connections[key] = conn
+    
+    return conn
+
+
+def _drop_conn(sql_endpoint: str, database: str, timeout: int = 30) -> None:
+    """Forget and close a cached connection whose link has failed."""
+    with _connections_lock:
+        conn = _connections.pop((sql_endpoint, database, timeout), None)
+    
+    if conn is not None:
+        try:
+            conn.close()
+        except pyodbc.Error:
+            pass
+
+
+@atexit.register
+def close_all() -> None:
+    """Close every cached SQL Endpoint connection."""
+    with _connections_lock:
+        connections = list(_connections.values())
+        _connections.clear()
+    
+    for conn in connections:
+        try:
+            conn.close()
+        except pyodbc.Error:
+            pass
+
+
 def validate_sql_query(
     sql: str,
     sql_endpoint: str,
@@ -43,6 +131,9 @@ def validate_sql_query(
     """
     Validate SQL query by executing against SQL Endpoint.
     
+    The connection is cached per endpoint and reused across calls; pyodbc
+    connections are not thread-safe, so validate from one thread at a time.
+    
     Args:
         sql: The SQL query to validate
         sql_endpoint: The SQL Endpoint hostname
@@ -58,21 +149,21 @@ def validate_sql_query(
         - error: Error message (if invalid)
     """
     try:
-        conn = get_sql_connection(sql_endpoint, database, timeout)
+        conn = _get_conn(sql_endpoint, database, timeout)
         cursor = conn.cursor()
         
-        # Execute query
-        cursor.execute(sql)
-        
-        # Get column info
-        columns = [desc[0] for desc in cursor.description]
-        
-        # Fetch sample data
-        rows = cursor.fetchall()
-        sample_row = rows[0] if rows else None
-        
-        cursor.close()
-        conn.close()
+        try:
+            # Execute query
+            cursor.execute(sql)
+            
+            # Get column info
+            columns = [desc[0] for desc in cursor.description]
+            
+            # Fetch sample data
+            rows = cursor.fetchall()
+            sample_row = rows[0] if rows else None
+        finally:
+            cursor.close()
         
         return {
             "valid": True,
@@ -81,6 +172,13 @@ def validate_sql_query(
             "sample_row": sample_row
         }
         
+    except pyodbc.OperationalError as e:
+        # Link-level failure: reconnect on the next call
+        _drop_conn(sql_endpoint, database, timeout)
+        return {
+            "valid": False,
+            "error": str(e)
+        }
     except pyodbc.Error as e:
         return {
             "valid": False,
@@ -93,6 +191,71 @@ def validate_sql_query(
         }
 
 
+def validate_sql_queries_batch(
+    sqls: List[str],
+    sql_endpoint: str,
+    database: str,
+    timeout: int = 30
+) -> List[Dict]:
+    """
+    Validate many SQL queries in a single round-trip without executing them.
+    
+    Every query is parsed and bound on the server with
+    sys.sp_describe_first_result_set; all describes are sent as one batch.
+    
+    Args:
+        sqls: The SQL queries to validate
+        sql_endpoint: The SQL Endpoint hostname
+        database: The database name
+        timeout: Connection timeout in seconds
+    
+    Returns:
+        List of dictionaries in input order:
+        - valid: Boolean indicating if query is valid
+        - columns: List of column names (if valid)
+        - error: Error message (if invalid)
+    """
+    results = []
+    
+    try:
+        conn = _get_conn(sql_endpoint, database, timeout)
+        cursor = conn.cursor()
+        
+        try:
+            for start in range(0, len(sqls), _MAX_BATCH_SIZE):
+                chunk = sqls[start:start + _MAX_BATCH_SIZE]
+                cursor.execute("SET NOCOUNT ON; " + _DESCRIBE_STATEMENT * len(chunk), *chunk)
+                
+                # One result set per statement, in order
+                for _ in chunk:
+                    rows = cursor.fetchall()
+                    if [desc[0] for desc in cursor.description] == ["error_message"]:
+                        results.append({"valid": False, "error": rows[0][0]})
+                    else:
+                        results.append({
+                            "valid": True,
+                            "columns": [row.name for row in rows if not row.is_hidden]
+                        })
+                    cursor.nextset()
+        finally:
+            cursor.close()
+        
+        return results
+    
+    except pyodbc.OperationalError as e:
+        # Link-level failure: reconnect on the next call
+        _drop_conn(sql_endpoint, database, timeout)
+        error = str(e)
+    except pyodbc.Error as e:
+        error = str(e)
+    except Exception as e:
+        error = f"Unexpected error: {str(e)}"
+    
+    # Queries the batch never reached share the batch error
+    results.extend({"valid": False, "error": error} for _ in range(len(sqls) - len(results)))
+    return results
+
+
 def validate_sql_syntax(sql: str) -> Dict:
     """
     Basic SQL syntax validation without database connection.
@@ -106,23 +269,15 @@ def validate_sql_syntax(sql: str) -> Dict:
     """
     issues = []
     
-    sql_upper = sql.upper()
+    found = {token.upper() for token in _SQL_TOKEN_RE.findall(sql)}
     
     # Check for Spark SQL patterns that should be T-SQL
-    if " LIMIT " in sql_upper:
-        issues.append("Use 'TOP N' instead of 'LIMIT' for T-SQL")
-    
-    if "DATE_SUB(" in sql_upper:
-        issues.append("Use 'DATEADD(DAY, -N, date)' instead of 'DATE_SUB' for T-SQL")
-    
-    if "DATE_ADD(" in sql_upper and "DATEADD(" not in sql_upper:
-        issues.append("Use 'DATEADD()' instead of 'DATE_ADD()' for T-SQL")
-    
-    if "CURRENT_DATE" in sql_upper and "GETDATE()" not in sql_upper:
-        issues.append("Use 'GETDATE()' or 'CAST(GETDATE() AS DATE)' instead of 'CURRENT_DATE' for T-SQL")
+    for token, tsql_token, message in _SPARK_ISSUES:
+        if token in found and tsql_token not in found:
+            issues.append(message)
     
     # Check for basic SQL structure
-    if not any(keyword in sql_upper for keyword in ["SELECT", "INSERT", "UPDATE", "DELETE"]):
+    if not found & _DML_TOKENS:
         issues.append("Query must start with SELECT, INSERT, UPDATE, or DELETE")
     
     return {
@@ -141,34 +296,27 @@ def convert_spark_to_tsql(sql: str) -> str:
     Returns:
         T-SQL equivalent query
     """
-    import re
-    
-    result = sql
-    
-    # LIMIT N -> TOP N
-    limit_match = re.search(r'\sLIMIT\s+(\d+)', result, re.IGNORECASE)
-    if limit_match:
-        n = limit_match.group(1)
-        # Remove LIMIT clause
-        result = re.sub(r'\sLIMIT\s+\d+', '', result, flags=re.IGNORECASE)
-        # Add TOP after SELECT
-        result = re.sub(r'SELECT\s+', f'SELECT TOP {n} ', result, count=1, flags=re.IGNORECASE)
-    
-    # DATE_SUB(date, N) -> DATEADD(DAY, -N, date)
-    result = re.sub(
-        r"DATE_SUB\(([^,]+),\s*(\d+)\)",
-        r"DATEADD(DAY, -\2, \1)",
-        result,
-        flags=re.IGNORECASE
-    )
+    limits = []
     
-    # CURRENT_DATE -> CAST(GETDATE() AS DATE)
-    result = re.sub(
-        r"CURRENT_DATE",
-        "CAST(GETDATE() AS DATE)",
-        result,
-        flags=re.IGNORECASE
-    )
+    def rewrite(match: re.Match) -> str:
+        # LIMIT N -> removed here, TOP N added below
+        if match.group("limit"):
+            limits.append(match.group("n"))
+            return ""
+        
+        # DATE_SUB(date, N) -> DATEADD(DAY, -N, date)
+        if match.group("datesub"):
+            date = _CURRENT_DATE_RE.sub("CAST(GETDATE() AS DATE)", match.group("date"))
+            return f"DATEADD(DAY, -{match.group('days')}, {date})"
+        
+        # CURRENT_DATE -> CAST(GETDATE() AS DATE)
+        return "CAST(GETDATE() AS DATE)"
+    
+    result = _SPARK_TO_TSQL_RE.sub(rewrite, sql)
+    
+    # Add TOP after SELECT
+    if limits:
+        result = _SELECT_RE.sub(f"SELECT TOP {limits[0]} ", result, count=1)
     
     return result
 